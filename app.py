@@ -25,15 +25,19 @@ import discord
 import yaml
 import re
 import os
-import json
+import io
+import asyncio
+import traceback
 from datetime import date, time, timedelta
 from zoneinfo import ZoneInfo
 from discord.ext import commands, tasks
 from bin.wordle_api_handler import WordleAPI
+from bin.archive import WordleArchive
+from bin.jobs import WordleJobs, get_wordle_puzzle
 
 # Wordle Schedule
 # 12:01AM: Rollover spoiler thread
-# 12:30AM: Calculate rankings for the previous day
+# 12:30AM: Calculate rankings for the previous day, then archive its results
 # 3:00AM: Update the leaderboard
 # 9:00AM: Post the daily ratings (Mon - Sat), Weekly rankings (Sun)
 # 5:00PM: Post the daily rankings
@@ -53,6 +57,8 @@ class WordleBot(commands.Cog):
         self.wordle = WordleAPI(self.config)
 
         self.round_digits = 3
+        self.archive = WordleArchive(self.config)
+        self.jobs = WordleJobs(self.config, self.wordle, self.archive, self.round_digits)
 
         self.general = int(config['discord']['general_channel_id'])
         self.lb = int(config['discord']['leaderboard_channel_id'])
@@ -65,19 +71,8 @@ class WordleBot(commands.Cog):
         self.daily_summary.start()
         self.leaderboard.start()
 
-    def get_wordle_puzzle(self, today):
-        first_wordle = date(2021, 6, 19)
-        delta = today - first_wordle
-        return delta.days
-    
-    def format_value(self, value: float):
-        if value == None:
-            return 0
-        else:
-            return round(value, self.round_digits)
-    
     def gen_thread_name(self, today):
-        puzzle = self.get_wordle_puzzle(today)
+        puzzle = get_wordle_puzzle(today)
         thread_name = f"Wordle {puzzle} Official Spoiler Thread"
         # thread_name = f"Wordle_{puzzle}"
         return thread_name
@@ -96,6 +91,62 @@ class WordleBot(commands.Cog):
         )
         return embed
 
+    def gen_history_response(self, player, start, end, data):
+        distribution = ', '.join(f"{'X' if i == 6 else i + 1}: {count}" for i, count in enumerate(data['distribution']))
+        data_points = [
+            f"Played: {data['played']} (Solved: {data['solved']}, Failed: {data['failed']})",
+            f"Average Score: {self.jobs.renderer.format_value(data['average_score'])}",
+            f"Average Calculated Score: {self.jobs.renderer.format_value(data['average_calculated_score'])}",
+            f"Best Rank: {data['best_rank'] or '-'}",
+            f"ELO: {self.jobs.renderer.format_value(data['start_elo'])} -> {self.jobs.renderer.format_value(data['end_elo'])}",
+            f"Distribution: {distribution}",
+        ]
+        embed = discord.Embed(
+            title = f"{player}'s Wordle History ({start} - {end})",
+            description = '\n'.join(data_points)
+        )
+        return embed
+
+    def archived_player(self, ctx, player):
+        # Returns (player, by_uuid): a typed player is looked up by registered name first,
+        # the requester by their uuid (Discord username), falling back to their display name
+        if player != False:
+            return player, False
+        author = ctx.message.author
+        if self.archive.find_player(author.name, by_uuid=True) != None:
+            return author.name, True
+        return author.display_name, False
+
+    def gen_report_embed(self, report):
+        embed = discord.Embed(title=report['title'])
+        for entry in report['entries']:
+            embed.add_field(
+                name=entry['name'],
+                value='\n'.join(f"{name} ({change})" if change else name for name, change in entry['fields']),
+                inline=report['inline']
+            )
+        return embed
+
+    async def publish_job(self, job, channel_id):
+        today = date.today()
+        # Jobs make blocking backend calls (archive makes one per player), keep them off the event loop
+        report = await asyncio.to_thread(self.jobs.run, job, today)
+        if report == None:
+            return False
+
+        channel = self.bot.get_channel(channel_id)
+        published = False
+        try:
+            if report['content']:
+                # Discord rejects messages over 2000 characters
+                await channel.send(report['content'][:2000])
+            else:
+                await channel.send(embed=self.gen_report_embed(report))
+            published = True
+        finally:
+            self.jobs.finish(job, today, published)
+        return published
+
     # ---
     # Event Listeners
     # ---
@@ -116,6 +167,7 @@ class WordleBot(commands.Cog):
                     msg = data.get('msg', response)
                     await message.channel.send(msg)
                 else:
+                    self.archive.add_player(data['player_name'], message.author.name)
                     active_threads = await message.guild.active_threads()
                     desired_thread = None
 
@@ -135,18 +187,19 @@ class WordleBot(commands.Cog):
     # ---
     @tasks.loop(time=time_calculate)
     async def calculate_daily(self):
-        today = date.today()
-        yesterday = today - timedelta(days=1)
-        channel = self.bot.get_channel(self.logging)
-
-        res = self.wordle.calculate_daily(yesterday)
-
-        await channel.send(json.dumps(res, indent=4))
+        if await self.publish_job('calculate_daily', self.logging):
+            # A failed archive must not stop the calculate_daily loop
+            try:
+                await self.publish_job('archive', self.logging)
+            except Exception as e:
+                traceback.print_exc()
+                channel = self.bot.get_channel(self.logging)
+                await channel.send(f"Error while archiving Wordle results: {type(e).__name__}: {e}")
 
     @tasks.loop(time=time_rollover)
     async def create_new_thread(self):
         channel = self.bot.get_channel(self.general)
-        puzzle = self.get_wordle_puzzle(date.today())
+        puzzle = get_wordle_puzzle(date.today())
         prev_thread = self.gen_thread_name(date.today() - timedelta(days=1))
         active_threads = await channel.guild.active_threads()
 
@@ -167,128 +220,18 @@ class WordleBot(commands.Cog):
     
     @tasks.loop(time=time_rankings)
     async def daily_ranks(self):
-        today = date.today()
-        res = self.wordle.daily_ranks(today)
-        channel = self.bot.get_channel(self.general)
-
-        if res.get('status', 200) == 404:
-            return False
-
-        embed = discord.Embed(title=f"{today}: Wordle Rankings")
-
-        for player in res['raw_data']:
-            embed.add_field(
-                name=f"{player['rank']}. {player['player_name']}",
-                value=f"Hard Mode: {player['hard_mode']}",
-                inline=False
-            )
-
-        await channel.send(embed=embed)
+        await self.publish_job('daily_ranks', self.general)
     
     @tasks.loop(time=time_ratings)
     async def daily_summary(self):
-        today = date.today()
-        yesterday = today - timedelta(days=1)
-        channel = self.bot.get_channel(self.report)
-
-        if today.weekday() == 6:
-            res = self.wordle.weekly_summary(yesterday)
-            if res.get('status', 200) == 404:
-                return False
-            
-            embed = discord.Embed(title=f"**{today}: Weekly Wordle Rankings**")
-
-            i = 0
-            n = 0
-            last_ord = False
-            for player, stats in res['sorted_player_stats'].items():
-                if stats['end_ord'] == last_ord:
-                    n += 1
-                else:
-                    last_ord = stats['end_ord']
-                    i += 1 + n
-                    n = 0
-
-
-                data_points = [
-                    f"Ordinal: {self.format_value(stats['start_ord'])} -> {self.format_value(stats['end_ord'])} (Δ {self.format_value(stats['ord_change'])})",
-                    f"ELO: {self.format_value(stats['start_elo'])} -> {self.format_value(stats['end_elo'])} (Δ {self.format_value(stats['elo_change'])})",
-                    f"Average Score: {stats['average_score']}"
-                ]
-
-                embed.add_field(
-                    name=f"{i}. {player}",
-                    value='\n'.join(data_points),
-                    inline=False
-                )
-
-            await channel.send(embed=embed)
+        if date.today().weekday() == 6:
+            await self.publish_job('weekly_summary', self.report)
         else:
-            res = self.wordle.daily_summary(today)
-            
-
-            if res.get('status', 200) == 404:
-                return False
-            
-            embed = discord.Embed(title=f"**{today}: Wordle Rankings**")
-
-            i = 0
-            n = 0
-            last_ord = False
-            for player, stats in res['sorted_player_stats'].items():
-                if stats['end_ord'] == last_ord:
-                    n += 1
-                else:
-                    last_ord = stats['end_ord']
-                    i += 1 + n
-                    n = 0
-                
-                data_points = [
-                    f"Ordinal: {self.format_value(stats['end_ord'])} (Δ {self.format_value(stats['ord_change'])})",
-                    f"ELO: {self.format_value(stats['end_elo'])} (Δ {self.format_value(stats['elo_change'])})",
-                ]
-
-                embed.add_field(
-                    name=f"{i}. {player}",
-                    value='\n'.join(data_points),
-                    inline=False
-                )
-
-            await channel.send(embed=embed)
+            await self.publish_job('daily_summary', self.report)
 
     @tasks.loop(time=time_leaderboard)
     async def leaderboard(self):
-        today = date.today()
-        data = self.wordle.leaderboard()
-        channel = self.bot.get_channel(self.lb)
-
-        embed = discord.Embed(title=f"Wordle Leaderboard ({today})")
-
-        i = 0
-        n = 0
-        last_ord = False
-        for player in data:
-            if player['player_ord'] == last_ord:
-                n += 1
-            else:
-                i += 1 + n
-                n = 0
-                last_ord = player['player_ord']
-            
-            data_points = [
-                f"Ordinal: {self.format_value(player['player_ord'])} (Δ {self.format_value(player['ord_delta'])})",
-                f"ELO: {self.format_value(player['player_elo'])} (Δ {self.format_value(player['elo_delta'])})",
-                f"Mu: {self.format_value(player['player_mu'])} (Δ {self.format_value(player['mu_delta'])})",
-                f"Sigma: {self.format_value(player['player_sigma'])} (Δ {self.format_value(player['sigma_delta'])})",
-            ]
-
-            embed.add_field(
-                name=f"{i}. {player['player_name']}",
-                value='\n'.join(data_points),
-                inline=True
-            )
-
-        await channel.send(embed=embed)
+        await self.publish_job('leaderboard', self.lb)
 
     # ---
     # Commands
@@ -324,6 +267,7 @@ class WordleBot(commands.Cog):
         if data.get('status', 200) == 409:
             await ctx.send(f"@{ctx.message.author.name} is already registered to play Wordle!")
         else:
+            self.archive.add_player(data['player_name'], data['player_uuid'])
             await ctx.send(f"Successfully registered @{data['player_uuid']} as {data['player_name']}")
 
     @commands.command()
@@ -332,8 +276,33 @@ class WordleBot(commands.Cog):
             await ctx.send("Please include a name to update the registration to, ex: `!update WordleBot`")
             return False
         data = self.wordle.update_registration(name, 'discord', ctx.message.author.name)
+        self.archive.add_player(data['player_name'], data['player_uuid'])
         await ctx.send(f"Successfully updated @{data['player_uuid']} to {data['player_name']}")
     
+    @commands.command()
+    async def history(self, ctx, start: int, end: int, player: str = False):
+        player, by_uuid = self.archived_player(ctx, player)
+        data = self.archive.summary(player, start, end, by_uuid)
+        if data == None:
+            await ctx.send(f"No archived Wordles for {player} between #{start} and #{end}")
+        else:
+            await ctx.send(embed=self.gen_history_response(player, start, end, data))
+
+    @commands.command()
+    async def streak(self, ctx, player: str = False):
+        player, by_uuid = self.archived_player(ctx, player)
+        data = self.archive.streak(player, by_uuid)
+        if data == None:
+            await ctx.send(f"No archived Wordles for {player}")
+        else:
+            await ctx.send(f"{player}'s current streak is {data['current']} (longest: {data['longest']})")
+
+    @commands.command()
+    async def export(self, ctx, start: int, end: int, player: str = None):
+        data = self.archive.to_csv(start, end, player)
+        filename = f"wordle_{start}_{end}{'_' + player if player else ''}.csv"
+        await ctx.send(file=discord.File(io.BytesIO(data.encode()), filename=filename))
+
     @commands.command()
     async def diagnose(self, ctx):
         await ctx.send(f"Checking in, it is currently {date.today()}")
@@ -0,0 +1,285 @@
+"""
+Competitive Ranked Wordle Results Archive
+    Compact local archive of daily results, answers history queries without hitting the backend
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import io
+import csv
+import json
+import fcntl
+import numpy as np
+from contextlib import contextmanager
+
+# One row per player per puzzle, kept sorted by (puzzle, player) so ranges are a binary search.
+# score: 1-6 guesses, 7 for a failed (X) puzzle, 0 if unknown. Missing floats are NaN.
+RESULT_DTYPE = np.dtype([
+    ('puzzle', '<u4'),
+    ('player', '<u4'),
+    ('rank', '<u2'),
+    ('score', 'u1'),
+    ('hard_mode', '?'),
+    ('calculated_score', '<f4'),
+    ('elo', '<f4'),
+    ('ordinal', '<f4'),
+])
+
+FAILED_SCORE = 7
+
+CSV_COLUMNS = ['puzzle', 'player_name', 'rank', 'score', 'hard_mode', 'calculated_score', 'elo', 'ordinal']
+
+class WordleArchive:
+    def __init__(self, config: dict):
+        jobs_config = config.get('jobs') or {}
+
+        self.archive_dir = jobs_config.get('archive_dir', 'archive')
+        self.results_file = os.path.join(self.archive_dir, 'results.npy')
+        self.players_file = os.path.join(self.archive_dir, 'players.json')
+
+        # Memory-mapped results, reloaded only when the files on disk change
+        # players.json: {'names': [display name], 'aliases': {lowercase registered name: id},
+        #                'uuids': {id: uuid}, 'uuid_ids': {lowercase uuid: id}}
+        # Names and uuids are kept apart so a name can never resolve to another player's uuid
+        self.cache_key = None
+        self.results = np.empty(0, dtype=RESULT_DTYPE)
+        self.players = {'names': [], 'aliases': {}, 'uuids': {}, 'uuid_ids': {}}
+
+    def parse_score(self, score):
+        if score == None:
+            return 0
+        if str(score).upper() == 'X':
+            return FAILED_SCORE
+        try:
+            return int(score)
+        except ValueError:
+            return 0
+
+    def solved(self, scores):
+        # Unknown (0) and failed scores both count as not solved
+        return (scores > 0) & (scores < FAILED_SCORE)
+
+    def parse_float(self, value):
+        if value == None:
+            return np.nan
+        return float(value)
+
+    # ---
+    # Storage
+    # ---
+    def write_atomic(self, path: str, write):
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+
+    @contextmanager
+    def locked(self):
+        # Serializes writers (bot and CLI) sharing the same archive directory
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with open(os.path.join(self.archive_dir, '.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def file_key(self, path: str):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def load(self):
+        key = (self.file_key(self.results_file), self.file_key(self.players_file))
+        if key != self.cache_key:
+            if key[1]:
+                with open(self.players_file, 'r') as f:
+                    self.players = json.load(f)
+                self.players.setdefault('uuids', {})
+                self.players.setdefault('uuid_ids', {})
+            if key[0]:
+                self.results = np.load(self.results_file, mmap_mode='r')
+            self.cache_key = key
+        return self.results, self.players
+
+    def player_id(self, players: dict, name: str, uuid: str = None):
+        """
+        A known uuid is the player's identity, a new name for it (!update) becomes another alias
+        of the same id. Without a uuid the name is only matched against registered names.
+        """
+        names = players['names']
+        aliases = players['aliases']
+        pid = players['uuid_ids'].get(uuid.lower()) if uuid else None
+        if pid == None:
+            name_pid = aliases.get(name.lower())
+            if name_pid != None and not (uuid and str(name_pid) in players['uuids']):
+                pid = name_pid
+            else:
+                pid = len(names)
+                names.append(name)
+
+        # The name belongs to whoever holds it now
+        aliases[name.lower()] = pid
+        if uuid:
+            players['uuid_ids'][uuid.lower()] = pid
+            players['uuids'][str(pid)] = uuid
+        return pid
+
+    def add_player(self, name: str, uuid: str):
+        """
+        Record a registered name and its platform uuid, so lookups by either resolve to the same player
+        """
+        with self.locked():
+            _, players = self.load()
+            if players['uuid_ids'].get(uuid.lower()) == players['aliases'].get(name.lower()) != None:
+                return
+            players = json.loads(json.dumps(players))
+            self.player_id(players, name, uuid)
+            self.write_atomic(self.players_file, lambda f: f.write(json.dumps(players).encode()))
+
+    def find_player(self, player: str, by_uuid: bool = False):
+        # Typed names match registered names first, the requester's own lookup (by_uuid) matches uuids first
+        _, players = self.load()
+        tables = [players['aliases'], players['uuid_ids']]
+        for table in (tables[::-1] if by_uuid else tables):
+            if player.lower() in table:
+                return table[player.lower()]
+        return None
+
+    def find_uuid(self, player: str):
+        _, players = self.load()
+        pid = players['aliases'].get(player.lower())
+        return players['uuids'].get(str(pid))
+
+    def add_puzzle(self, puzzle: int, ranks: list, ratings: dict = None):
+        """
+        Replace the archived results for a puzzle with the given daily ranks
+        ranks: daily-ranks raw_data, ratings: daily-summary sorted_player_stats (optional)
+        """
+        ratings = ratings or {}
+        with self.locked():
+            return self.write_puzzle(puzzle, ranks, ratings)
+
+    def write_puzzle(self, puzzle: int, ranks: list, ratings: dict):
+        results, players = self.load()
+        players = json.loads(json.dumps(players))
+
+        rows = np.zeros(len(ranks), dtype=RESULT_DTYPE)
+        for i, player in enumerate(ranks):
+            stats = ratings.get(player['player_name'], {})
+            rows[i] = (
+                puzzle,
+                self.player_id(players, player['player_name'], player.get('player_uuid')),
+                player.get('rank') or 0,
+                self.parse_score(player.get('score')),
+                str(player.get('hard_mode')).upper() in ('1', 'TRUE', 'Y'),
+                self.parse_float(player.get('calculated_score')),
+                self.parse_float(stats.get('end_elo')),
+                self.parse_float(stats.get('end_ord')),
+            )
+
+        merged = np.concatenate([results[results['puzzle'] != puzzle], rows])
+        merged = merged[np.lexsort((merged['player'], merged['puzzle']))]
+
+        # Players first, so every id in the results file always resolves to a name
+        self.write_atomic(self.players_file, lambda f: f.write(json.dumps(players).encode()))
+        self.write_atomic(self.results_file, lambda f: np.save(f, merged))
+        return len(rows)
+
+    # ---
+    # Queries
+    # ---
+    def puzzle_range(self, start: int, end: int):
+        results, _ = self.load()
+        lo = np.searchsorted(results['puzzle'], start, side='left')
+        hi = np.searchsorted(results['puzzle'], end, side='right')
+        return results[lo:hi]
+
+    def history(self, player: str, start: int, end: int, by_uuid: bool = False):
+        pid = self.find_player(player, by_uuid)
+        if pid == None:
+            return None
+        rows = self.puzzle_range(start, end)
+        return rows[rows['player'] == pid]
+
+    def summary(self, player: str, start: int, end: int, by_uuid: bool = False):
+        rows = self.history(player, start, end, by_uuid)
+        if rows is None or len(rows) == 0:
+            return None
+
+        scores = rows['score']
+        solved = scores[self.solved(scores)]
+        elo = rows['elo'][~np.isnan(rows['elo'])]
+        return {
+            'played': len(rows),
+            'solved': len(solved),
+            'failed': int(np.count_nonzero(scores == FAILED_SCORE)),
+            'average_score': float(solved.mean()) if len(solved) else None,
+            'average_calculated_score': float(np.nanmean(rows['calculated_score'])) if not np.isnan(rows['calculated_score']).all() else None,
+            'distribution': np.bincount(scores, minlength=FAILED_SCORE + 1)[1:].tolist(),
+            'best_rank': int(rows['rank'][rows['rank'] > 0].min()) if (rows['rank'] > 0).any() else None,
+            'start_elo': float(elo[0]) if len(elo) else None,
+            'end_elo': float(elo[-1]) if len(elo) else None,
+        }
+
+    def streak(self, player: str, by_uuid: bool = False):
+        """
+        Current and longest run of consecutive puzzles solved (failed, missed or unknown scores break it)
+        The current streak counts back from the latest archived puzzle
+        """
+        results, _ = self.load()
+        pid = self.find_player(player, by_uuid)
+        if pid == None or len(results) == 0:
+            return None
+
+        rows = results[results['player'] == pid]
+        puzzles = rows['puzzle'][self.solved(rows['score'])].astype(np.int64)
+        if len(puzzles) == 0:
+            return {'current': 0, 'longest': 0}
+
+        breaks = np.flatnonzero(np.diff(puzzles) != 1)
+        run_starts = np.concatenate([[0], breaks + 1])
+        run_ends = np.concatenate([breaks, [len(puzzles) - 1]])
+        lengths = run_ends - run_starts + 1
+
+        latest = int(results['puzzle'][-1])
+        current = int(lengths[-1]) if puzzles[-1] == latest else 0
+        return {'current': current, 'longest': int(lengths.max())}
+
+    def to_csv(self, start: int, end: int, player: str = None):
+        _, players = self.load()
+        if player:
+            rows = self.history(player, start, end)
+            if rows is None:
+                rows = np.empty(0, dtype=RESULT_DTYPE)
+        else:
+            rows = self.puzzle_range(start, end)
+
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(CSV_COLUMNS)
+        names = players['names']
+        for row in rows.tolist():
+            puzzle, pid, rank, score, hard_mode, calculated_score, elo, ordinal = row
+            writer.writerow([
+                puzzle,
+                names[pid],
+                rank,
+                'X' if score == FAILED_SCORE else (score or ''),
+                'Y' if hard_mode else 'N',
+                *['' if np.isnan(value) else round(value, 3) for value in (calculated_score, elo, ordinal)]
+            ])
+        return out.getvalue()
@@ -22,9 +22,14 @@ import random
 import json
 from datetime import date, timedelta
 from wordle_api_handler import WordleAPI
+from archive import WordleArchive
+from jobs import JOBS, WordleJobs
 
 class WordleCalculations:
-    def __init__(self, config: dict, wordle: WordleAPI, round_digits: int = 3):
+    """
+    Standalone runner for deployments without the bot, publishes the shared job reports through webhooks
+    """
+    def __init__(self, config: dict, jobs: WordleJobs):
         self.lb = config['discord']['leaderboard_webhook']
         self.general = config['discord']['general_webhook']
         self.report = config['discord']['report_webhook']
@@ -32,175 +37,71 @@ class WordleCalculations:
         self.lb_message = config['discord']['leaderboard_message']
 
         self.today = date.today()
-        self.yesterday = self.today - timedelta(days=1)
 
-        self.wordle = wordle
+        self.jobs = jobs
 
-        self.round_digits = round_digits
-
-    def format_value(self, value: float):
-        if value == None:
-            return 0
-        else:
-            return round(value, self.round_digits)
-
-    def calculate_daily(self):
-        res = self.wordle.calculate_daily(self.yesterday)
-    
-    def daily_ranks(self):
-        res = self.wordle.daily_ranks(self.today)
-        if res.get('status', 200) == 404:
-            return False
-        
-        webhook = {
-            "content": f"**{self.today}: Wordle Rankings**",
-            "embeds": [],
-            "attachments": []
+        # calculate_daily and archive are not published anywhere, only run
+        self.webhooks = {
+            'calculate_daily': None,
+            'archive': None,
+            'daily_ranks': self.general,
+            'daily_summary': self.report,
+            'weekly_summary': self.report,
+            'leaderboard': self.lb,
         }
-        for player in res['raw_data']:
-            lb_entry = {
-                "title": f"{player['rank']}. {player['player_name']}",
-                "description": f"Hard Mode: {player['hard_mode']}",
-                "color": random.randint(0, 16777215),
-            }
-            webhook['embeds'].append(lb_entry)
-        
-        res = requests.post(self.general, data=json.dumps(webhook), headers={'Content-Type': 'application/json'})
 
-    
-    def daily_summary(self):
-        res = self.wordle.daily_summary(self.today)
-        if res.get('status', 200) == 404:
-            return False
+    def gen_webhook(self, report: dict):
         webhook = {
-            "content": f"**{self.today}: Wordle Rankings**",
+            "content": report['webhook_title'],
             "embeds": [],
             "attachments": []
         }
-
-        i = 0
-        n = 0
-        last_ord = False
-        for player, stats in res['sorted_player_stats'].items():
-            if stats['end_ord'] == last_ord:
-                n += 1
-            else:
-                last_ord = stats['end_ord']
-                i += 1 + n
-                n = 0
+        for entry in report['entries']:
             lb_entry = {
-                "title": f"{i}. {player}",
+                "title": entry['name'],
                 "color": random.randint(0, 16777215),
-                "fields": [
-                    {
-                        "name": f"Ordinal: {self.format_value(stats['end_ord'])}",
-                        "value": f"Δ {self.format_value(stats['ord_change'])}",
-                        "inline": True
-                    },
-                    {
-                        "name": f"ELO: {self.format_value(stats['end_elo'])}",
-                        "value": f"Δ {self.format_value(stats['elo_change'])}",
-                        "inline": True
-                    }
-                ]
             }
+            if any(change for _, change in entry['fields']):
+                lb_entry['fields'] = [{"name": name, "value": change, "inline": True} for name, change in entry['fields']]
+            else:
+                lb_entry['description'] = '\n'.join(name for name, _ in entry['fields'])
             webhook['embeds'].append(lb_entry)
-        res = requests.post(self.report, data=json.dumps(webhook), headers={'Content-Type': 'application/json'})
+        return webhook
 
+    def publish(self, job: str, report: dict):
+        url = self.webhooks[job]
+        if url == None:
+            return True
 
-    def weekly_summary(self):
-        res = self.wordle.weekly_summary(self.yesterday)
-        if res.get('status', 200) == 404:
-            return False
-        webhook = {
-            "content": f"**{self.today}: Weekly Wordle Rankings**",
-            "embeds": [],
-            "attachments": []
-        }
-        i = 0
-        n = 0
-        last_ord = False
-        for player, stats in res['sorted_player_stats'].items():
-            if stats['end_ord'] == last_ord:
-                n += 1
-            else:
-                last_ord = stats['end_ord']
-                i += 1 + n
-                n = 0
-            lb_entry = {
-                "title": f"{i}. {player}",
-                "color": random.randint(0, 16777215),
-                "fields": [
-                    {
-                        "name": f"Ordinal: {self.format_value(stats['start_ord'])} -> {self.format_value(stats['end_ord'])}",
-                        "value": f"Δ {self.format_value(stats['ord_change'])}",
-                        "inline": True
-                    },
-                    {
-                        "name": f"ELO: {self.format_value(stats['start_elo'])} -> {self.format_value(stats['end_elo'])}",
-                        "value": f"Δ {self.format_value(stats['elo_change'])}",
-                        "inline": True
-                    },
-                    {
-                        "name": f"Average Score: {stats['average_score']}",
-                        "value": f"",
-                        "inline": True
-                    },
-                ]
-            }
-            webhook['embeds'].append(lb_entry)
-        res = requests.post(self.report, data=json.dumps(webhook), headers={'Content-Type': 'application/json'})
+        headers = {'Content-Type': 'application/json'}
+        data = json.dumps(self.gen_webhook(report))
+        if job == 'leaderboard' and self.lb_message:
+            res = requests.patch(f"{url}/messages/{self.lb_message}", data=data, headers=headers)
+        else:
+            res = requests.post(url, data=data, headers=headers)
+        return res.ok
 
-    def leaderboard(self):
-        data = self.wordle.leaderboard()
-        webhook = {
-            "content": f"Wordle Leaderboard ({self.today})",
-            "embeds": [],
-            "attachments": []
-        }
+    def run(self, job: str):
+        report = self.jobs.run(job, self.today)
+        if report == None:
+            return False
 
-        i = 0
-        n = 0
-        last_ord = False
-        for player in data:
-            if player['player_ord'] == last_ord:
-                n += 1
+        published = False
+        try:
+            published = self.publish(job, report)
+        finally:
+            self.jobs.finish(job, self.today, published)
+        return published
+
+    def backfill(self, end: date, days: int):
+        # Manual re-archive of past puzzles, no lease or publish since add_puzzle replaces existing rows
+        for offset in range(days - 1, -1, -1):
+            puzzle_date = end - timedelta(days=offset)
+            res = self.jobs.archive_results(puzzle_date)
+            if res.get('status', 200) == 404:
+                print(f"No results for {puzzle_date}, skipping...")
             else:
-                i += 1 + n
-                n = 0
-                last_ord = player['player_ord']
-            lb_entry = {
-                "title": f"{i}. {player['player_name']}",
-                "color": random.randint(0, 16777215),
-                "fields": [
-                    {
-                        "name": f"Ordinal: {self.format_value(player['player_ord'])}",
-                        "value": f"Δ {self.format_value(player['ord_delta'])}",
-                        "inline": True
-                    },
-                    {
-                        "name": f"ELO: {self.format_value(player['player_elo'])}",
-                        "value": f"Δ {self.format_value(player['elo_delta'])}",
-                        "inline": True
-                    },
-                    {
-                        "name": f"Mu: {self.format_value(player['player_mu'])}",
-                        "value": f"Δ {self.format_value(player['mu_delta'])}",
-                        "inline": True
-                    },
-                    {
-                        "name": f"Sigma: {self.format_value(player['player_sigma'])}",
-                        "value": f"Δ {self.format_value(player['sigma_delta'])}",
-                        "inline": True
-                    }
-                ]
-            }
-            webhook['embeds'].append(lb_entry)
-        
-        if self.lb_message:
-            res = requests.patch(f"{self.lb}/messages/{self.lb_message}", data=json.dumps(webhook), headers={'Content-Type': 'application/json'})
-        else:
-            res = requests.post(self.lb, data=json.dumps(webhook), headers={'Content-Type': 'application/json'})
+                print(f"Archived {res['players']} results for Wordle {res['puzzle']} ({res['missing']} without a score)")
 
 if __name__ == '__main__':
     import yaml
@@ -208,8 +109,10 @@ if __name__ == '__main__':
     import os
 
     parser = argparse.ArgumentParser(description='Competitive Ranked Wordle Backend Calculations Script')
-    parser.add_argument('mode', choices=['calculate_daily', 'daily_ranks', 'daily_summary', 'weekly_summary', 'leaderboard'])
+    parser.add_argument('mode', choices=JOBS)
     parser.add_argument('--config', default='config.yml')
+    parser.add_argument('--date', type=date.fromisoformat, help='archive only: puzzle date (YYYY-MM-DD) to archive, backfills instead of the nightly run')
+    parser.add_argument('--days', type=int, default=1, help='archive only: number of days to backfill, ending at --date')
 
     args = parser.parse_args()
 
@@ -218,16 +121,13 @@ if __name__ == '__main__':
         config = yaml.safe_load(f)
 
     wordle = WordleAPI(config)
-    calculations = WordleCalculations(config, wordle)
-
-    match args.mode:
-        case 'calculate_daily':
-            calculations.calculate_daily()
-        case 'daily_ranks':
-            calculations.daily_ranks()
-        case 'daily_summary':
-            calculations.daily_summary()
-        case 'weekly_summary':
-            calculations.weekly_summary()
-        case 'leaderboard':
-            calculations.leaderboard()
\ No newline at end of file
+    archive = WordleArchive(config)
+    calculations = WordleCalculations(config, WordleJobs(config, wordle, archive))
+
+    if args.date:
+        if args.mode != 'archive':
+            parser.error('--date is only supported with archive')
+        calculations.backfill(args.date, args.days)
+    # The archive always follows the daily calculations
+    elif calculations.run(args.mode) and args.mode == 'calculate_daily':
+        calculations.run('archive')
@@ -0,0 +1,315 @@
+"""
+Competitive Ranked Wordle Job Runner
+    Shared job definitions, report rendering and publish leases for the bot and the CLI
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import json
+import time
+import fcntl
+import socket
+from datetime import date, timedelta
+
+JOBS = ['calculate_daily', 'archive', 'daily_ranks', 'daily_summary', 'weekly_summary', 'leaderboard']
+
+def get_wordle_puzzle(today: date):
+    first_wordle = date(2021, 6, 19)
+    delta = today - first_wordle
+    return delta.days
+
+# Jobs that change state when fetched, their lease stays complete even if publishing the report fails
+SIDE_EFFECT_JOBS = ['calculate_daily', 'archive']
+
+class WordleRenderer:
+    """
+    Turns backend responses into a platform neutral report:
+        {'title': str, 'webhook_title': str, 'content': str | None, 'inline': bool,
+         'entries': [{'name': str, 'fields': [(str, str)]}]}
+    Each field is a (value, change) pair, e.g. ("Ordinal: 1.5", "Δ 0.2"), change may be empty.
+    The bot turns this into a discord.Embed, the CLI into a webhook payload.
+    """
+    def __init__(self, round_digits: int = 3):
+        self.round_digits = round_digits
+
+    def format_value(self, value: float):
+        if value == None:
+            return 0
+        else:
+            return round(value, self.round_digits)
+
+    def report(self, title: str, entries: list = None, content: str = None, inline: bool = False, webhook_title: str = None):
+        return {
+            'title': title,
+            'webhook_title': webhook_title or title,
+            'content': content,
+            'inline': inline,
+            'entries': entries or []
+        }
+
+    def ranked(self, rows, key):
+        # Players sharing the same ordinal share the same rank
+        i = 0
+        n = 0
+        last_ord = False
+        for row in rows:
+            if key(row) == last_ord:
+                n += 1
+            else:
+                last_ord = key(row)
+                i += 1 + n
+                n = 0
+            yield i, row
+
+    def calculate_daily(self, today: date, res: dict):
+        return self.report(f"{today - timedelta(days=1)}: Daily Calculations", content=json.dumps(res, indent=4))
+
+    def archive(self, today: date, res: dict):
+        return self.report(f"{today - timedelta(days=1)}: Archive", content=f"Archived {res['players']} results for Wordle {res['puzzle']} ({res['missing']} without a score)")
+
+    def daily_ranks(self, today: date, res: dict):
+        entries = []
+        for player in res['raw_data']:
+            entries.append({
+                'name': f"{player['rank']}. {player['player_name']}",
+                'fields': [(f"Hard Mode: {player['hard_mode']}", "")]
+            })
+        return self.report(f"{today}: Wordle Rankings", entries, webhook_title=f"**{today}: Wordle Rankings**")
+
+    def daily_summary(self, today: date, res: dict):
+        entries = []
+        for i, (player, stats) in self.ranked(res['sorted_player_stats'].items(), lambda row: row[1]['end_ord']):
+            entries.append({
+                'name': f"{i}. {player}",
+                'fields': [
+                    (f"Ordinal: {self.format_value(stats['end_ord'])}", f"Δ {self.format_value(stats['ord_change'])}"),
+                    (f"ELO: {self.format_value(stats['end_elo'])}", f"Δ {self.format_value(stats['elo_change'])}"),
+                ]
+            })
+        return self.report(f"**{today}: Wordle Rankings**", entries)
+
+    def weekly_summary(self, today: date, res: dict):
+        entries = []
+        for i, (player, stats) in self.ranked(res['sorted_player_stats'].items(), lambda row: row[1]['end_ord']):
+            entries.append({
+                'name': f"{i}. {player}",
+                'fields': [
+                    (f"Ordinal: {self.format_value(stats['start_ord'])} -> {self.format_value(stats['end_ord'])}", f"Δ {self.format_value(stats['ord_change'])}"),
+                    (f"ELO: {self.format_value(stats['start_elo'])} -> {self.format_value(stats['end_elo'])}", f"Δ {self.format_value(stats['elo_change'])}"),
+                    (f"Average Score: {stats['average_score']}", ""),
+                ]
+            })
+        return self.report(f"**{today}: Weekly Wordle Rankings**", entries)
+
+    def leaderboard(self, today: date, data: list):
+        entries = []
+        for i, player in self.ranked(data, lambda row: row['player_ord']):
+            entries.append({
+                'name': f"{i}. {player['player_name']}",
+                'fields': [
+                    (f"Ordinal: {self.format_value(player['player_ord'])}", f"Δ {self.format_value(player['ord_delta'])}"),
+                    (f"ELO: {self.format_value(player['player_elo'])}", f"Δ {self.format_value(player['elo_delta'])}"),
+                    (f"Mu: {self.format_value(player['player_mu'])}", f"Δ {self.format_value(player['mu_delta'])}"),
+                    (f"Sigma: {self.format_value(player['player_sigma'])}", f"Δ {self.format_value(player['sigma_delta'])}"),
+                ]
+            })
+        return self.report(f"Wordle Leaderboard ({today})", entries, inline=True)
+
+class JobLease:
+    """
+    File based lease so two runners (bot and cron, or two bots) never publish the same report twice.
+    A lease file is created exclusively, marked done once published, and can be taken over if
+    the holder died before finishing (older than ttl seconds). Takeovers are serialized with
+    flock on a lock file in the lease directory, so only one runner can replace a stale lease.
+    """
+    def __init__(self, lease_dir: str, ttl: int = 3600, keep_days: int = 14):
+        self.lease_dir = lease_dir
+        self.ttl = ttl
+        self.keep_days = keep_days
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    def path(self, key: str):
+        return os.path.join(self.lease_dir, f"{key}.lease")
+
+    def write(self, path: str, done: bool, exclusive: bool = False):
+        flags = os.O_WRONLY | os.O_CREAT | (os.O_EXCL if exclusive else os.O_TRUNC)
+        fd = os.open(path, flags, 0o644)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'owner': self.owner, 'acquired': time.time(), 'done': done}, f)
+
+    def is_stale(self, path: str):
+        # None means the lease is gone and can be created again
+        try:
+            with open(path, 'r') as f:
+                lease = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Half written lease, only trust the file age
+            try:
+                return time.time() - os.path.getmtime(path) > self.ttl
+            except FileNotFoundError:
+                return None
+        return not lease.get('done', False) and time.time() - lease.get('acquired', 0) > self.ttl
+
+    def prune(self):
+        cutoff = time.time() - self.keep_days * 86400
+        for name in os.listdir(self.lease_dir):
+            path = os.path.join(self.lease_dir, name)
+            if name.endswith('.lease') and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+
+    def acquire(self, key: str):
+        os.makedirs(self.lease_dir, exist_ok=True)
+        path = self.path(key)
+        for _ in range(3):
+            try:
+                self.write(path, done=False, exclusive=True)
+                return True
+            except FileExistsError:
+                pass
+
+            with open(os.path.join(self.lease_dir, '.takeover.lock'), 'w') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                # Re-check under the lock, another runner may have just replaced it
+                stale = self.is_stale(path)
+                if stale == False:
+                    return False
+                if stale:
+                    os.remove(path)
+            # Lease is gone now, race for the exclusive create again
+        return False
+
+    def complete(self, key: str):
+        self.write(self.path(key), done=True)
+        self.prune()
+
+    def release(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+class WordleJobs:
+    """
+    Runs the scheduled backend jobs against one shared WordleAPI client, renderer and archive.
+    run() returns a rendered report (or None if there is nothing to publish / another
+    runner holds the lease), the caller publishes it and then calls finish().
+    """
+    def __init__(self, config: dict, wordle, archive, round_digits: int = 3):
+        jobs_config = config.get('jobs') or {}
+
+        self.wordle = wordle
+        self.archive = archive
+        self.renderer = WordleRenderer(round_digits)
+        self.lease = JobLease(
+            jobs_config.get('lease_dir', 'leases'),
+            int(jobs_config.get('lease_ttl', 3600))
+        )
+
+    def lease_key(self, job: str, today: date):
+        return f"{job}-{today}"
+
+    def fetch(self, job: str, today: date):
+        yesterday = today - timedelta(days=1)
+        match job:
+            case 'calculate_daily':
+                return self.wordle.calculate_daily(yesterday)
+            case 'archive':
+                return self.archive_results(yesterday)
+            case 'daily_ranks':
+                return self.wordle.daily_ranks(today)
+            case 'daily_summary':
+                return self.wordle.daily_summary(today)
+            case 'weekly_summary':
+                return self.wordle.weekly_summary(yesterday)
+            case 'leaderboard':
+                return self.wordle.leaderboard()
+        raise ValueError(f"Unknown job: {job}")
+
+    def archive_results(self, puzzle_date: date):
+        # Pull the finished day once, after calculate_daily has run for it
+        res = self.wordle.daily_ranks(puzzle_date)
+        if res.get('status', 200) == 404:
+            return res
+
+        summary = self.wordle.daily_summary(puzzle_date + timedelta(days=1))
+        ratings = {} if summary.get('status', 200) == 404 else summary.get('sorted_player_stats', {})
+
+        puzzle = get_wordle_puzzle(puzzle_date)
+        ranks = [self.fill_score(player, puzzle) for player in res['raw_data']]
+        count = self.archive.add_puzzle(puzzle, ranks, ratings)
+        missing = sum(1 for player in ranks if player.get('score') == None)
+        return {'puzzle': puzzle, 'players': count, 'missing': missing}
+
+    def fill_score(self, player: dict, puzzle: int):
+        """
+        daily-ranks only guarantees rank, player_name and hard_mode. Anything else comes from
+        /score, which needs the player's uuid (learned from submissions and registrations).
+        """
+        if player.get('score') != None:
+            return player
+
+        uuid = player.get('player_uuid') or self.archive.find_uuid(player['player_name'])
+        if not uuid:
+            return player
+
+        data = self.wordle.check_score(uuid, puzzle)
+        if data.get('status', 200) == 404:
+            return player
+        return {
+            **player,
+            'player_uuid': uuid,
+            'score': data.get('score'),
+            'calculated_score': data.get('calculated_score', player.get('calculated_score')),
+        }
+
+    def run(self, job: str, today: date = None):
+        today = today or date.today()
+        key = self.lease_key(job, today)
+
+        if not self.lease.acquire(key):
+            print(f"{job} for {today} already handled by another runner, skipping...")
+            return None
+
+        try:
+            res = self.fetch(job, today)
+        except Exception:
+            self.lease.release(key)
+            raise
+
+        if isinstance(res, dict) and res.get('status', 200) == 404:
+            self.lease.complete(key)
+            return None
+
+        try:
+            return getattr(self.renderer, job)(today, res)
+        except Exception:
+            self.finish(job, today, published=False)
+            raise
+
+    def finish(self, job: str, today: date = None, published: bool = True):
+        today = today or date.today()
+        key = self.lease_key(job, today)
+        if published:
+            self.lease.complete(key)
+        elif job in SIDE_EFFECT_JOBS:
+            # The job already ran, only the post was lost, running it again would duplicate it
+            print(f"{job} for {today} ran but its report was not published")
+            self.lease.complete(key)
+        else:
+            self.lease.release(key)
@@ -18,6 +18,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 import requests
+import time
 
 class WordleAPI:
     def __init__(self, config):
@@ -25,15 +26,26 @@ class WordleAPI:
         self.username = config['wordle']['username']
         self.password = config['wordle']['password']
 
+        # One session and one token per client, shared by every job and command
+        self.session = requests.Session()
+        self.token_ttl = int(config['wordle'].get('token_ttl', 600))
+        self.token = None
+        self.token_expires = 0
+
     def auth(self):
+        if self.token and time.monotonic() < self.token_expires:
+            return self.token
+
         data = {
             'grant_type': 'password',
             'username': self.username,
             'password': self.password
         }
-        req = requests.post(f"{self.base_url}/token", data=data)
+        req = self.session.post(f"{self.base_url}/token", data=data)
         body = req.json()
-        return body['access_token']
+        self.token = body['access_token']
+        self.token_expires = time.monotonic() + self.token_ttl
+        return self.token
 
     def create_headers(self):
         headers = {
@@ -41,14 +53,21 @@ class WordleAPI:
         }
         return headers
 
+    def request(self, method: str, path: str, **kwargs):
+        req = self.session.request(method, f"{self.base_url}{path}", headers=self.create_headers(), **kwargs)
+        if req.status_code == 401:
+            # Token was revoked or expired early, re-authenticate once
+            self.token = None
+            req = self.session.request(method, f"{self.base_url}{path}", headers=self.create_headers(), **kwargs)
+        return req.json()
+
     def register(self, player_name: str, player_platform: str, player_uuid: str):
         data = {
             "player_name": player_name,
             "player_platform": player_platform,
             "player_uuid": player_uuid
         }
-        req = requests.post(f"{self.base_url}/register", headers=self.create_headers(), json=data)
-        return req.json()
+        return self.request('POST', "/register", json=data)
 
     def update_registration(self, player_name: str, player_platform: str, player_uuid: str):
         data = {
@@ -56,41 +75,32 @@ class WordleAPI:
             "player_platform": player_platform,
             "player_uuid": player_uuid
         }
-        req = requests.post(f"{self.base_url}/update-registration", headers=self.create_headers(), json=data)
-        return req.json()
+        return self.request('POST', "/update-registration", json=data)
 
     def add_score(self, score: str, uuid: str):
         data = {
             'score': score,
             'uuid': uuid
         }
-        req = requests.post(f"{self.base_url}/add-score", headers=self.create_headers(), json=data)
-        return req.json()
+        return self.request('POST', "/add-score", json=data)
 
     def check_score(self, uuid: str, puzzle: int):
-        req = requests.get(f"{self.base_url}/score/{uuid}?puzzle={puzzle}", headers=self.create_headers())
-        return req.json()
+        return self.request('GET', f"/score/{uuid}?puzzle={puzzle}")
 
     def blame(self, uuid: str, puzzle: int):
-        req = requests.get(f"{self.base_url}/blame/{uuid}?puzzle={puzzle}", headers=self.create_headers())
-        return req.json()
+        return self.request('GET', f"/blame/{uuid}?puzzle={puzzle}")
     
     def leaderboard(self):
-        req = requests.get(f"{self.base_url}/leaderboard", headers=self.create_headers())
-        return req.json()
+        return self.request('GET', "/leaderboard")
     
     def calculate_daily(self, puzzle_date: str):
-        req = requests.get(f"{self.base_url}/calculate-daily/?puzzle_date={puzzle_date}", headers=self.create_headers())
-        return req.json()
+        return self.request('GET', f"/calculate-daily/?puzzle_date={puzzle_date}")
 
     def daily_ranks(self, report_date: str):
-        req = requests.get(f"{self.base_url}/daily-ranks/?report_date={report_date}", headers=self.create_headers())
-        return req.json()
+        return self.request('GET', f"/daily-ranks/?report_date={report_date}")
     
     def daily_summary(self, report_date: str):
-        req = requests.get(f"{self.base_url}/daily-summary/?report_date={report_date}", headers=self.create_headers())
-        return req.json()
+        return self.request('GET', f"/daily-summary/?report_date={report_date}")
     
     def weekly_summary(self, report_date: str):
-        req = requests.get(f"{self.base_url}/weekly-summary/?end_date={report_date}", headers=self.create_headers())
-        return req.json()
\ No newline at end of file
+        return self.request('GET', f"/weekly-summary/?end_date={report_date}")
\ No newline at end of file